@@ -1,11 +1,40 @@
+import os
+import json
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 
 API_BASE = "https://finace-stock.onrender.com"
  # FastAPI Server URL
 
 st.set_page_config(page_title="Finance MCP Dashboard", page_icon="💹", layout="wide")
 
+# Keep-alive session shared across Streamlit reruns
+@st.cache_resource
+def get_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Identifies the dashboard so the server rate-limits it as one trusted client
+    dashboard_key = os.getenv("DASHBOARD_API_KEY")
+    if dashboard_key:
+        session.headers["X-Dashboard-Key"] = dashboard_key
+    return session
+
+SESSION = get_session()
+
+def rate_limit_message(response):
+    """Message from the server's 429 envelope"""
+    try:
+        message = response.json().get("message", "Rate limit exceeded")
+    except ValueError:
+        message = "Rate limit exceeded"
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        message += f" – try again in {retry_after}s"
+    return f"⏳ {message}"
+
 st.title("💹 Finance MCP – Streamlit Dashboard")
 st.write("Interact with your Finance MCP Server using this interface.")
 
@@ -17,10 +46,10 @@ st.markdown("---")
 st.header("🔍 Server Health Check")
 if st.button("Check Server Health"):
     try:
-        response = requests.get(f"{API_BASE}/health").json()
+        response = SESSION.get(f"{API_BASE}/health").json()
         st.success("Server is Running")
         st.json(response)
-    except:
+    except requests.RequestException:
         st.error("❌ Unable to connect to FastAPI server.")
 
 st.markdown("---")
@@ -30,21 +59,28 @@ st.markdown("---")
 # ---------------------------
 st.header("📈 Stock Price")
 
-symbol = st.text_input("Enter Stock Symbol (Example: AAPL, TSLA)", "")
+with st.form("stock"):
+    symbol = st.text_input("Enter Stock Symbol (Example: AAPL, TSLA)", "")
+    stock_submitted = st.form_submit_button("Get Stock Price")
 
-if st.button("Get Stock Price"):
+if stock_submitted:
     if symbol.strip() == "":
         st.warning("Enter a stock symbol.")
     else:
         try:
             payload = {"symbol": symbol}
-            response = requests.post(f"{API_BASE}/stock_price", json=payload).json()
-
-            if "error" in response:
-                st.error(response["error"])
+            response = SESSION.post(f"{API_BASE}/stock_price", json=payload)
+            data = response.json()
+
+            if response.status_code == 429:
+                st.error(rate_limit_message(response))
+            elif "error" in data:
+                st.error(data["error"])
+            elif "detail" in data:
+                st.error(data["detail"])
             else:
-                st.success(f"Price fetched for {response['symbol']}")
-                st.json(response)
+                st.success(f"Price fetched for {data['symbol']}")
+                st.json(data)
         except Exception as e:
             st.error(f"Error: {e}")
 
@@ -55,16 +91,22 @@ st.markdown("---")
 # ---------------------------
 st.header("🪙 Crypto Price")
 
-crypto = st.text_input("Enter Crypto Symbol (BTC, ETH)", "")
+with st.form("crypto"):
+    crypto = st.text_input("Enter Crypto Symbol (BTC, ETH)", "")
+    crypto_submitted = st.form_submit_button("Get Crypto Price")
 
-if st.button("Get Crypto Price"):
+if crypto_submitted:
     if crypto.strip() == "":
         st.warning("Enter a crypto symbol.")
     else:
         try:
             payload = {"symbol": crypto}
-            response = requests.post(f"{API_BASE}/crypto_price", json=payload).json()
-            st.json(response)
+            response = SESSION.post(f"{API_BASE}/crypto_price", json=payload)
+
+            if response.status_code == 429:
+                st.error(rate_limit_message(response))
+            else:
+                st.json(response.json())
         except Exception as e:
             st.error(f"Error: {e}")
 
@@ -75,21 +117,39 @@ st.markdown("---")
 # ---------------------------
 st.header("📰 Finance News")
 
-query = st.text_input("Enter News Query (Example: stocks, crypto, market)", "finance")
+# Last /news_sources ETag and body, kept so refreshes can be answered with 304
+@st.cache_resource
+def sources_validator():
+    return {"etag": None, "sources": None}
+
+# Load available sources from API (cached across reruns)
+@st.cache_data(ttl=600)
+def fetch_sources():
+    validator = sources_validator()
+    headers = {"If-None-Match": validator["etag"]} if validator["etag"] else {}
+    response = SESSION.get(f"{API_BASE}/news_sources", headers=headers)
+
+    if response.status_code == 304 and validator["sources"] is not None:
+        return validator["sources"]
+
+    sources = [src["name"] for src in response.json()["available_sources"]]
+    validator.update(etag=response.headers.get("ETag"), sources=sources)
+    return sources
 
-# Load available sources from API
 try:
-    sources = requests.get(f"{API_BASE}/news_sources").json()
-    source_options = [src["name"] for src in sources["available_sources"]]
-except:
+    source_options = fetch_sources()
+except (requests.RequestException, KeyError, TypeError):
     source_options = ["all", "yahoo", "newsapi", "alphavantage"]
 
-selected_source = st.selectbox("News Source", source_options)
+with st.form("news"):
+    query = st.text_input("Enter News Query (Example: stocks, crypto, market)", "finance")
+    selected_source = st.selectbox("News Source", source_options)
+    news_submitted = st.form_submit_button("Get News")
 
-if st.button("Get News"):
+if news_submitted:
     try:
         payload = {"query": query, "source": selected_source}
-        response = requests.post(f"{API_BASE}/finance_news", json=payload).json()
+        response = SESSION.post(f"{API_BASE}/finance_news", json=payload).json()
 
         # SAFE ACCESS
         articles = response.get("articles", [])
@@ -112,14 +172,36 @@ if st.button("Get News"):
 # ---------------------------
 st.header("🤖 AI Finance Analysis (GPT)")
 
-prompt = st.text_area("Enter your question (Example: Analyze Tesla stock movement)")
-
-if st.button("Get AI Analysis"):
+def stream_analysis(prompt):
+    """Yield text deltas from the server's SSE analysis stream"""
+    with SESSION.post(f"{API_BASE}/ai_analysis_stream", json={"prompt": prompt}, stream=True) as response:
+        if response.status_code == 429:
+            yield rate_limit_message(response)
+            return
+
+        response.raise_for_status()
+        response.encoding = "utf-8"
+
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data: "):
+                continue
+            data = line[len("data: "):]
+            if data == "[DONE]":
+                break
+            event = json.loads(data)
+            if "error" in event:
+                yield f"\n\n⚠️ {event['error']} – the answer above is incomplete."
+                break
+            yield event["delta"]
+
+with st.form("ai"):
+    prompt = st.text_area("Enter your question (Example: Analyze Tesla stock movement)")
+    ai_submitted = st.form_submit_button("Get AI Analysis")
+
+if ai_submitted:
     try:
-        payload = {"prompt": prompt}
-        response = requests.post(f"{API_BASE}/ai_analysis", json=payload).json()
         st.success("AI Response:")
-        st.write(response["response"])
+        st.write_stream(stream_analysis(prompt))
     except Exception as e:
         st.error(f"Error: {e}")
 
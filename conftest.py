@@ -0,0 +1,19 @@
+import pytest
+
+import server
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breakers():
+    """Breakers are module-level, so failures in one test must not open them for the next"""
+    breakers = [
+        server.newsapi_breaker,
+        server.yahoo_news_breaker,
+        server.yfinance_breaker,
+        server.binance_breaker,
+        server.openai_breaker,
+    ]
+    for breaker in breakers:
+        breaker.failures = 0
+        breaker.opened_at = None
+    yield
@@ -1,10 +1,25 @@
 import os
+import re
+import hmac
+import hashlib
 import time
-import requests
+import random
+import asyncio
+import httpx
+import orjson
+import xxhash
+import pandas as pd
 import yfinance as yf
-from fastapi import FastAPI, HTTPException
+from yfinance.exceptions import YFException
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from openai import OpenAI, APIConnectionError, RateLimitError
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError, RateLimitError
 import logging
 from datetime import datetime
 from typing import List, Dict
@@ -20,6 +35,8 @@ logger = logging.getLogger(__name__)
 # -------------------------------------------------
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+DASHBOARD_API_KEY = os.getenv("DASHBOARD_API_KEY")
 
 if not OPENAI_API_KEY:
     logger.error("OPENAI_API_KEY is missing!")
@@ -30,7 +47,267 @@ if not NEWS_API_KEY:
 # -------------------------------------------------
 # FASTAPI APP
 # -------------------------------------------------
-app = FastAPI(title="Finance MCP Server", version="1.1.1")
+app = FastAPI(
+    title="Finance MCP Server",
+    version="1.1.1",
+    default_response_class=ORJSONResponse
+)
+
+# -------------------------------------------------
+# SHARED HTTP CLIENT
+# -------------------------------------------------
+# One pooled async client for all upstream calls (NewsAPI, Binance).
+# Created on startup so each worker process gets its own connection pool.
+http: httpx.AsyncClient = None
+
+@app.on_event("startup")
+async def open_http_client():
+    global http
+    http = httpx.AsyncClient(
+        timeout=10,
+        http2=True,
+        limits=httpx.Limits(max_connections=100)
+    )
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await http.aclose()
+
+# -------------------------------------------------
+# RESPONSE CACHE
+# -------------------------------------------------
+PRICE_CACHE_TTL = 30   # seconds
+NEWS_CACHE_TTL = 300   # seconds
+AI_CACHE_TTL = 600     # seconds
+
+class Cache:
+    """TTL cache backed by Redis, falling back to an in-process LRU"""
+
+    def __init__(self, url: str, maxsize: int = 1024):
+        self.url = url
+        self.redis = None
+        self.use_redis = False
+        self.local = OrderedDict()  # key -> (expires_at, value)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    async def connect(self):
+        self.redis = Redis.from_url(self.url, decode_responses=True)
+        try:
+            await self.redis.ping()
+            self.use_redis = True
+            logger.info("Redis cache connected")
+        except (RedisError, OSError) as e:
+            logger.warning(f"Redis unavailable – using in-process cache: {str(e)}")
+
+    async def close(self):
+        if self.redis:
+            await self.redis.aclose()
+
+    async def get(self, key: str):
+        value = None
+        if self.use_redis:
+            try:
+                value = await self.redis.get(key)
+            except RedisError as e:
+                logger.error(f"Redis get error: {str(e)}")
+        else:
+            entry = self.local.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.local.move_to_end(key)
+                value = entry[1]
+            elif entry:
+                del self.local[key]
+
+        if value is None:
+            self.misses += 1
+            logger.info(f"Cache miss: {key} (hits={self.hits}, misses={self.misses})")
+        else:
+            self.hits += 1
+            logger.info(f"Cache hit: {key} (hits={self.hits}, misses={self.misses})")
+        return value
+
+    async def setex(self, key: str, ttl: int, value):
+        if self.use_redis:
+            try:
+                await self.redis.setex(key, ttl, value)
+            except RedisError as e:
+                logger.error(f"Redis set error: {str(e)}")
+            return
+
+        self.local[key] = (time.monotonic() + ttl, value)
+        self.local.move_to_end(key)
+        if len(self.local) > self.maxsize:
+            self.local.popitem(last=False)
+
+
+cache = Cache(REDIS_URL)
+
+@app.on_event("startup")
+async def connect_cache():
+    await cache.connect()
+
+@app.on_event("shutdown")
+async def close_cache():
+    await cache.close()
+
+# -------------------------------------------------
+# RATE LIMITING
+# -------------------------------------------------
+# Clients are keyed by IP. X-Forwarded-For is only honored from proxies listed
+# in uvicorn's FORWARDED_ALLOW_IPS (default 127.0.0.1). The Streamlit dashboard
+# makes calls on behalf of all its users, so it authenticates with
+# DASHBOARD_API_KEY and gets its own, larger bucket.
+RATE_LIMIT = 30             # requests per window, per client IP
+DASHBOARD_RATE_LIMIT = 600  # requests per window for the dashboard host
+RATE_LIMIT_WINDOW = 60      # seconds
+
+class RateLimitExceeded(Exception):
+    def __init__(self, retry_after: int, limit: int):
+        self.retry_after = retry_after
+        self.limit = limit
+
+class RateLimiter:
+    """Fixed-window per-client limiter, shared through Redis when available"""
+
+    def __init__(self, cache: Cache, limit: int, window: int, dashboard_limit: int):
+        self.cache = cache
+        self.limit = limit
+        self.window = window
+        self.dashboard_limit = dashboard_limit
+        self.local: Dict[str, int] = {}  # client -> count for local_window
+        self.local_window = 0
+
+    async def hit(self, client_id: str, limit: int) -> int:
+        """Count a request; return seconds until reset if over the limit, else 0"""
+        now = time.time()
+        window = int(now // self.window)
+        retry_after = int(self.window - now % self.window) + 1
+
+        if self.cache.use_redis:
+            key = f"ratelimit:{client_id}:{window}"
+            try:
+                count = await self.cache.redis.incr(key)
+                if count == 1:
+                    await self.cache.redis.expire(key, self.window)
+            except RedisError as e:
+                logger.error(f"Rate limiter error: {str(e)}")
+                return 0
+        else:
+            if window != self.local_window:
+                self.local = {}
+                self.local_window = window
+            count = self.local[client_id] = self.local.get(client_id, 0) + 1
+
+        return retry_after if count > limit else 0
+
+    async def __call__(self, request: Request):
+        dashboard_key = request.headers.get("x-dashboard-key")
+        if DASHBOARD_API_KEY and dashboard_key and hmac.compare_digest(dashboard_key, DASHBOARD_API_KEY):
+            client_id, limit = "dashboard", self.dashboard_limit
+        else:
+            client_id = request.client.host if request.client else "unknown"
+            limit = self.limit
+
+        retry_after = await self.hit(client_id, limit)
+        if retry_after:
+            logger.warning(f"Rate limit exceeded for {client_id}")
+            raise RateLimitExceeded(retry_after, limit)
+
+
+rate_limiter = RateLimiter(cache, RATE_LIMIT, RATE_LIMIT_WINDOW, DASHBOARD_RATE_LIMIT)
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
+    return ORJSONResponse(
+        status_code=429,
+        content={
+            "ok": False,
+            "code": "agent.rate_limited",
+            "message": f"Rate limit of {exc.limit} requests per {RATE_LIMIT_WINDOW}s exceeded"
+        },
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+# -------------------------------------------------
+# CIRCUIT BREAKERS
+# -------------------------------------------------
+class CircuitOpenError(Exception):
+    pass
+
+def is_upstream_failure(exc: Exception) -> bool:
+    """True for connection errors, timeouts and 5xx responses"""
+    if isinstance(exc, APIStatusError):
+        return exc.status_code >= 500
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, (httpx.TransportError, APIConnectionError, OSError))
+
+def is_error_response(result) -> bool:
+    """True for upstream responses returned normally with a 5xx status"""
+    return isinstance(result, httpx.Response) and result.status_code >= 500
+
+def is_empty_download(result) -> bool:
+    """yf.download swallows network errors and returns no rows, so a batch
+    where every symbol came back empty is treated as an upstream failure"""
+    return not isinstance(result, pd.DataFrame) or result.dropna(how="all").empty
+
+class CircuitBreaker:
+    """Fail fast on an upstream after fail_max consecutive failures,
+    letting a single trial call through every reset_timeout seconds"""
+
+    def __init__(self, name: str, fail_max: int = 5, reset_timeout: int = 60,
+                 is_failed_result=is_error_response):
+        self.name = name
+        self.is_failed_result = is_failed_result
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    async def call(self, func, *args, **kwargs):
+        if self.opened_at is not None:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"{self.name} circuit open")
+            # Half-open: restart the window so concurrent calls keep failing fast
+            self.opened_at = time.monotonic()
+
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            # Client errors (bad request, auth, rate limit) mean the upstream is up
+            if is_upstream_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+
+        if self.is_failed_result(result):
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.fail_max:
+            if self.opened_at is None:
+                logger.warning(f"{self.name} circuit opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info(f"{self.name} circuit closed")
+        self.failures = 0
+        self.opened_at = None
+
+
+newsapi_breaker = CircuitBreaker("NewsAPI")
+yahoo_news_breaker = CircuitBreaker("Yahoo Finance news")
+yfinance_breaker = CircuitBreaker("yfinance quotes", is_failed_result=is_empty_download)
+binance_breaker = CircuitBreaker("Binance")
+openai_breaker = CircuitBreaker("OpenAI")
 
 # -------------------------------------------------
 # ROBUST OPENAI WRAPPER
@@ -41,39 +318,180 @@ class RobustOpenAIClient:
             self.client = None
             return
 
-        self.client = OpenAI(api_key=api_key)
+        self.client = AsyncOpenAI(api_key=api_key)
         self.max_retries = 3
         self.base_delay = 1
+        self.max_delay = 30
+
+    def backoff_delay(self, attempt):
+        """Capped exponential backoff with random jitter"""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * (1 + random.uniform(0, 0.5))
 
-    def chat_completion_with_retry(self, model, messages):
+    async def chat_completion_with_retry(self, model, messages, stream=False):
         if not self.client:
             raise HTTPException(500, "OpenAI client missing")
 
         for attempt in range(self.max_retries):
+            delay = self.backoff_delay(attempt)
+
             try:
-                return self.client.chat.completions.create(
+                return await openai_breaker.call(
+                    self.client.chat.completions.create,
                     model=model,
                     messages=messages,
-                    timeout=30
+                    timeout=30,
+                    stream=stream
                 )
 
-            except (APIConnectionError, requests.exceptions.ConnectionError):
-                time.sleep(self.base_delay * (2 ** attempt))
+            except CircuitOpenError as e:
+                raise HTTPException(503, f"AI Error: {str(e)}")
 
-            except RateLimitError:
-                time.sleep(60)
+            except RateLimitError as e:
+                # Honor the server's Retry-After hint (in seconds), up to max_delay
+                retry_after = e.response.headers.get("retry-after")
+                try:
+                    delay = min(self.max_delay, float(retry_after)) if retry_after else delay
+                except ValueError:
+                    pass
+
+            except (APIConnectionError, httpx.ConnectError):
+                pass
+
+            except APIStatusError as e:
+                # Auth / bad request errors won't succeed on retry
+                if e.status_code < 500:
+                    raise HTTPException(500, f"AI Error: {str(e)}")
 
             except Exception as e:
                 if attempt == self.max_retries - 1:
                     raise HTTPException(500, f"AI Error: {str(e)}")
 
-                time.sleep(self.base_delay * (2 ** attempt))
+            if attempt < self.max_retries - 1:
+                await asyncio.sleep(delay)
 
         raise HTTPException(500, "Max retries exceeded")
 
+    async def stream_chat(self, model, messages):
+        """Yield completion text deltas as they arrive"""
+        stream = await self.chat_completion_with_retry(model, messages, stream=True)
+
+        # Closing releases the upstream response if our client disconnects early
+        async with stream:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
 
 client = RobustOpenAIClient(api_key=OPENAI_API_KEY)
 
+# -------------------------------------------------
+# YFINANCE TICKERS
+# -------------------------------------------------
+# yfinance is sync-only; its blocking calls get their own pool so they
+# can't starve the default executor
+YF_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="yf")
+
+@app.on_event("shutdown")
+def close_yf_pool():
+    YF_POOL.shutdown(wait=False, cancel_futures=True)
+
+TICKER_REFRESH = 300  # seconds before a memoized Ticker is rebuilt
+
+@lru_cache(maxsize=512)
+def cached_ticker(symbol: str, epoch: int) -> yf.Ticker:
+    return yf.Ticker(symbol)
+
+def get_ticker(symbol: str) -> yf.Ticker:
+    """Reuse Ticker objects per symbol; some yfinance versions keep fetched
+    news on the instance, so they are rebuilt every TICKER_REFRESH seconds"""
+    return cached_ticker(symbol.upper(), int(time.time() // TICKER_REFRESH))
+
+# -------------------------------------------------
+# STOCK QUOTE BATCHER
+# -------------------------------------------------
+class InvalidSymbolError(ValueError):
+    pass
+
+# yf.download splits ticker strings on whitespace and commas, so one such
+# "symbol" would expand into many tickers
+SYMBOL_SEPARATORS = re.compile(r"[\s,]")
+
+class QuoteBatcher:
+    """Coalesce concurrent stock lookups into batched yf.download calls"""
+
+    def __init__(self, max_wait: float = 0.05, max_batch: int = 50, timeout: float = 30):
+        self.max_wait = max_wait      # seconds to collect symbols before fetching
+        self.max_batch = max_batch    # symbols per yfinance call
+        self.timeout = timeout        # seconds a caller waits for its quote
+        self.pending: Dict[str, List[asyncio.Future]] = {}
+        self.flush_task = None
+        # yf.download keeps its results in module-global state, so calls
+        # must never overlap
+        self.download_lock = asyncio.Lock()
+
+    async def get_history(self, symbol: str) -> pd.DataFrame:
+        """Queue a symbol for the next batch and wait for its 1d history"""
+        if not symbol or SYMBOL_SEPARATORS.search(symbol):
+            raise InvalidSymbolError(f"Invalid stock symbol: {symbol!r}")
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending.setdefault(symbol, []).append(future)
+
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush())
+
+        return await asyncio.wait_for(future, self.timeout)
+
+    async def flush(self):
+        await asyncio.sleep(self.max_wait)
+        pending, self.pending = self.pending, {}
+        self.flush_task = None
+
+        symbols = list(pending)
+        async with self.download_lock:
+            for i in range(0, len(symbols), self.max_batch):
+                await self.fetch(symbols[i:i + self.max_batch], pending)
+
+    async def fetch(self, symbols: List[str], pending: Dict[str, List[asyncio.Future]]):
+        loop = asyncio.get_running_loop()
+        logger.info(f"Fetching batched quotes for {len(symbols)} symbols")
+
+        try:
+            data = await yfinance_breaker.call(loop.run_in_executor, YF_POOL, lambda: yf.download(
+                tickers=symbols,
+                period="1d",
+                group_by="ticker",
+                threads=True,
+                ignore_tz=False,
+                progress=False
+            ))
+            if not isinstance(data, pd.DataFrame):
+                data = pd.DataFrame()  # no rows for any symbol
+
+            for symbol in symbols:
+                if isinstance(data.columns, pd.MultiIndex):
+                    if symbol in data.columns.get_level_values(0):
+                        frame = data[symbol].dropna(how="all")
+                    else:
+                        frame = pd.DataFrame()
+                else:
+                    frame = data.dropna(how="all")
+
+                for future in pending[symbol]:
+                    if not future.done():
+                        future.set_result(frame)
+
+        except Exception as e:
+            # Never leave a caller waiting on an unresolved future
+            for symbol in symbols:
+                for future in pending[symbol]:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+quote_batcher = QuoteBatcher()
+
 # -------------------------------------------------
 # REQUEST MODELS
 # -------------------------------------------------
@@ -93,11 +511,18 @@ class AIRequest(BaseModel):
 # -------------------------------------------------
 # NEWS SERVICE - FIXED VERSION
 # -------------------------------------------------
+TITLE_NOISE = re.compile(r"\W+")
+
+def title_hash(title: str) -> int:
+    """Hash a title after normalizing case, punctuation and whitespace"""
+    normalized = TITLE_NOISE.sub(" ", (title or "").lower()).strip()
+    return xxhash.xxh64_intdigest(normalized.encode())
+
 class NewsService:
     def __init__(self):
         self.api_key = NEWS_API_KEY
 
-    def get_newsapi_news(self, query: str) -> List[Dict]:
+    async def get_newsapi_news(self, query: str) -> List[Dict]:
         """Get news from NewsAPI with proper error handling"""
         if not self.api_key:
             logger.warning("NewsAPI key not available")
@@ -111,13 +536,13 @@ class NewsService:
                 'apiKey': self.api_key,
                 'language': 'en',
                 'sortBy': 'publishedAt',
-                'pageSize': 10
+                'pageSize': 5  # only the first 5 articles are used
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = await newsapi_breaker.call(http.get, url, params=params)
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 articles = data.get('articles', [])
                 
                 formatted_articles = []
@@ -138,12 +563,13 @@ class NewsService:
             logger.error(f"NewsAPI exception: {str(e)}")
             return []
 
-    def get_yahoo_finance_news(self, query: str) -> List[Dict]:
+    async def get_yahoo_finance_news(self, query: str) -> List[Dict]:
         """Get news from Yahoo Finance"""
         try:
             # Try to get news for the query as a ticker
-            ticker = yf.Ticker(query.upper())
-            raw_news = ticker.news
+            ticker = get_ticker(query)
+            loop = asyncio.get_running_loop()
+            raw_news = await yahoo_news_breaker.call(loop.run_in_executor, YF_POOL, lambda: ticker.news)
 
             if not raw_news:
                 return []
@@ -190,108 +616,229 @@ class NewsService:
             }
         ]
 
-    def get_news(self, query: str, source: str) -> List[Dict]:
+    async def get_news(self, query: str, source: str) -> List[Dict]:
         """Main method to get news from specified sources"""
         articles = []
         
         logger.info(f"Fetching news for query: '{query}' from source: '{source}'")
 
-        # Get news based on source preference
+        # Get news based on source preference, fetching selected sources concurrently
+        fetchers = []
         if source in ["all", "newsapi"]:
-            newsapi_articles = self.get_newsapi_news(query)
-            articles.extend(newsapi_articles)
-            logger.info(f"NewsAPI returned {len(newsapi_articles)} articles")
+            fetchers.append(("NewsAPI", self.get_newsapi_news(query)))
 
         if source in ["all", "yahoo"]:
-            yahoo_articles = self.get_yahoo_finance_news(query)
-            articles.extend(yahoo_articles)
-            logger.info(f"Yahoo Finance returned {len(yahoo_articles)} articles")
+            fetchers.append(("Yahoo Finance", self.get_yahoo_finance_news(query)))
+
+        results = await asyncio.gather(
+            *(fetch for _, fetch in fetchers),
+            return_exceptions=True
+        )
+
+        for (name, _), result in zip(fetchers, results):
+            if isinstance(result, Exception):
+                logger.error(f"{name} fetch failed: {str(result)}")
+                result = []
+            articles.extend(result)
+            logger.info(f"{name} returned {len(result)} articles")
 
         # If no articles found, use fallback
         if not articles:
             logger.info("No articles found from APIs, using fallback")
             articles = self.get_fallback_news(query)
 
-        # Remove duplicates based on title
+        # Remove duplicates based on normalized title, stopping at 8 articles
         unique_articles = []
         seen_titles = set()
         
         for article in articles:
-            title = article["title"]
-            if title not in seen_titles:
-                unique_articles.append(article)
-                seen_titles.add(title)
+            title = title_hash(article["title"])
+            if title in seen_titles:
+                continue
+            seen_titles.add(title)
+            unique_articles.append(article)
+            if len(unique_articles) >= 8:
+                break
 
         logger.info(f"Returning {len(unique_articles)} unique articles")
-        return unique_articles[:8]  # Return up to 8 articles
+        return unique_articles
 
 
 news_service = NewsService()
 
+# -------------------------------------------------
+# AI ANALYSIS HELPERS
+# -------------------------------------------------
+AI_MODEL = "gpt-3.5-turbo"
+AI_SYSTEM_PROMPT = "You are a financial analyst. Provide clear, concise financial analysis and insights."
+EMPTY_PROMPT_RESPONSE = "❌ Please enter a valid financial question or analysis request."
+
+def analysis_messages(prompt_text: str) -> List[Dict]:
+    return [
+        {"role": "system", "content": AI_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt_text}
+    ]
+
+def sse_event(text: str) -> bytes:
+    """Encode a text delta as a Server-Sent Events message"""
+    return b"data: " + orjson.dumps({"delta": text}) + b"\n\n"
+
+def sse_error(message: str) -> bytes:
+    """Encode an error that cut the stream short as a Server-Sent Events message"""
+    return b"event: error\ndata: " + orjson.dumps({"error": message}) + b"\n\n"
+
+SSE_DONE = b"data: [DONE]\n\n"
+
+# Stop proxies from buffering the stream and undoing the time-to-first-token gain
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+TIME_SENSITIVE = re.compile(r"\b(today|now|current)\b", re.IGNORECASE)
+
+def ai_cache_key(prompt_text: str):
+    """Cache key for a prompt, or None when the answer depends on the current time"""
+    if TIME_SENSITIVE.search(prompt_text):
+        return None
+    return "ai:" + hashlib.blake2b(prompt_text.encode(), digest_size=16).hexdigest()
+
+DUMMY_TEMPLATES = (
+    "📊 **Financial Analysis Report**\n\n**Your Query:** {q}\n\nBased on current market data, I recommend monitoring key indicators and consulting with a financial advisor for personalized advice.",
+    "🤖 **AI Financial Insights**\n\n**Topic:** {q}\n\nMarket trends show moderate volatility. Consider diversifying your portfolio and maintaining a long-term perspective.",
+    "💡 **Investment Analysis**\n\n**Request:** {q}\n\nCurrent analysis suggests careful monitoring of market conditions. Technical indicators show neutral to positive momentum."
+)
+
+# -------------------------------------------------
+# STATIC RESPONSE BODIES
+# -------------------------------------------------
+# Serialized once at import; these payloads never change at runtime
+NEWS_SOURCES_ETAG = '"v1"'  # bump when the source list changes
+
+NEWS_SOURCES_BODY = orjson.dumps({
+    "available_sources": [
+        {"name": "all", "description": "All available sources"},
+        {"name": "newsapi", "description": "NewsAPI - Comprehensive news"},
+        {"name": "yahoo", "description": "Yahoo Finance - Financial news"},
+    ]
+})
+
+ROOT_BODY = orjson.dumps({
+    "message": "Finance MCP Server running",
+    "version": "1.1.1"
+})
+
+# Only the timestamp varies; it is substituted for %s per request
+HEALTH_TEMPLATE = orjson.dumps({
+    "status": "healthy",
+    "timestamp": "%s",
+    "openai": "configured" if OPENAI_API_KEY else "missing",
+    "news_api": "configured" if NEWS_API_KEY else "missing"
+})
+
 # -------------------------------------------------
 # ENDPOINTS
 # -------------------------------------------------
 
 @app.get("/news_sources")
-def get_news_sources():
+async def get_news_sources(request: Request):
     """Endpoint to get available news sources"""
-    return {
-        "available_sources": [
-            {"name": "all", "description": "All available sources"},
-            {"name": "newsapi", "description": "NewsAPI - Comprehensive news"},
-            {"name": "yahoo", "description": "Yahoo Finance - Financial news"},
-        ]
-    }
+    headers = {"Cache-Control": "public, max-age=300", "ETag": NEWS_SOURCES_ETAG}
+
+    if request.headers.get("if-none-match") == NEWS_SOURCES_ETAG:
+        return Response(status_code=304, headers=headers)
+
+    return Response(NEWS_SOURCES_BODY, media_type="application/json", headers=headers)
+
+@app.post("/stock_price", dependencies=[Depends(rate_limiter)])
+async def stock_price(req: StockRequest):
+    key = f"stock:{req.symbol.upper()}"
+    cached = await cache.get(key)
+    if cached:
+        return orjson.loads(cached)
 
-@app.post("/stock_price")
-def stock_price(req: StockRequest):
     try:
-        ticker = yf.Ticker(req.symbol.upper())
-        data = ticker.history(period="1d")
+        data = await quote_batcher.get_history(req.symbol.upper())
 
         if data.empty:
             raise HTTPException(400, "Invalid stock symbol")
 
-        return {
+        result = {
             "symbol": req.symbol.upper(),
             "price": float(data["Close"].iloc[-1]),
             "timestamp": data.index[-1].isoformat()
         }
+        await cache.setex(key, PRICE_CACHE_TTL, orjson.dumps(result))
+        return result
 
-    except Exception as e:
+    except HTTPException:
+        raise
+
+    except InvalidSymbolError:
+        raise HTTPException(400, "Invalid stock symbol")
+
+    except CircuitOpenError as e:
+        raise HTTPException(503, f"Stock price error: {str(e)}")
+
+    except asyncio.TimeoutError:
+        raise HTTPException(504, "Stock price error: quote lookup timed out")
+
+    except (KeyError, IndexError, ValueError, OSError, YFException) as e:
         raise HTTPException(500, f"Stock price error: {str(e)}")
 
-@app.post("/crypto_price")
-def crypto_price(req: CryptoRequest):
+@app.post("/crypto_price", dependencies=[Depends(rate_limiter)])
+async def crypto_price(req: CryptoRequest):
+    key = f"crypto:{req.symbol.upper()}"
+    cached = await cache.get(key)
+    if cached:
+        return orjson.loads(cached)
+
     try:
         url = f"https://api.binance.com/api/v3/ticker/price?symbol={req.symbol.upper()}USDT"
-        r = requests.get(url).json()
+        r = orjson.loads((await binance_breaker.call(http.get, url)).content)
 
         if "price" not in r:
             raise HTTPException(400, "Invalid crypto symbol")
 
-        return {
+        result = {
             "symbol": req.symbol.upper(),
             "price": float(r["price"]),
             "timestamp": datetime.now().isoformat()
         }
+        await cache.setex(key, PRICE_CACHE_TTL, orjson.dumps(result))
+        return result
 
-    except Exception as e:
+    except HTTPException:
+        raise
+
+    except CircuitOpenError as e:
+        raise HTTPException(503, f"Crypto error: {str(e)}")
+
+    except (KeyError, ValueError, httpx.HTTPError) as e:
         raise HTTPException(500, f"Crypto error: {str(e)}")
 
 @app.post("/finance_news")
-def finance_news(req: NewsRequest):
+async def finance_news(req: NewsRequest):
+    # Queries are case-insensitive for caching; responses echo the caller's spelling
+    key = f"news:{req.source}:{req.query.lower()}"
+    cached = await cache.get(key)
+    if cached:
+        result = orjson.loads(cached)
+        result["query"] = req.query
+        return result
+
     try:
-        articles = news_service.get_news(req.query, req.source)
+        articles = await news_service.get_news(req.query, req.source)
 
-        return {
+        result = {
             "query": req.query,
             "source": req.source,
             "articles_found": len(articles),
             "articles": articles
         }
+        # Don't pin the fallback for the full TTL when every upstream failed
+        if any(article["provider"] != "fallback" for article in articles):
+            await cache.setex(key, NEWS_CACHE_TTL, orjson.dumps(result))
+        return result
 
-    except Exception as e:
+    except (KeyError, ValueError, TypeError, httpx.HTTPError, OSError) as e:
         logger.error(f"News error: {str(e)}")
 
         fallback = news_service.get_fallback_news(req.query)
@@ -304,27 +851,31 @@ def finance_news(req: NewsRequest):
             "note": "Using fallback news due to error"
         }
 
-@app.post("/ai_analysis")
-def ai_analysis(req: AIRequest):
+@app.post("/ai_analysis", dependencies=[Depends(rate_limiter)])
+async def ai_analysis(req: AIRequest):
     try:
         # Validate prompt
         if not req.prompt or not req.prompt.strip():
-            return {"response": "❌ Please enter a valid financial question or analysis request."}
+            return {"response": EMPTY_PROMPT_RESPONSE}
 
         prompt_text = req.prompt.strip()
         
         # If OpenAI is configured, use it
         if OPENAI_API_KEY:
+            key = ai_cache_key(prompt_text)
+            cached = await cache.get(key) if key else None
+            if cached:
+                return {"response": cached}
+
             try:
-                completion = client.chat_completion_with_retry(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a financial analyst. Provide clear, concise financial analysis and insights."},
-                        {"role": "user", "content": prompt_text}
-                    ]
+                completion = await client.chat_completion_with_retry(
+                    model=AI_MODEL,
+                    messages=analysis_messages(prompt_text)
                 )
                 
                 analysis = completion.choices[0].message.content
+                if key and analysis:
+                    await cache.setex(key, AI_CACHE_TTL, analysis)
                 return {"response": analysis}
                 
             except Exception as e:
@@ -332,38 +883,80 @@ def ai_analysis(req: AIRequest):
                 # Fall through to dummy response
         
         # Dummy AI response (fallback)
-        dummy_responses = [
-            f"📊 **Financial Analysis Report**\n\n**Your Query:** {prompt_text}\n\nBased on current market data, I recommend monitoring key indicators and consulting with a financial advisor for personalized advice.",
-            f"🤖 **AI Financial Insights**\n\n**Topic:** {prompt_text}\n\nMarket trends show moderate volatility. Consider diversifying your portfolio and maintaining a long-term perspective.",
-            f"💡 **Investment Analysis**\n\n**Request:** {prompt_text}\n\nCurrent analysis suggests careful monitoring of market conditions. Technical indicators show neutral to positive momentum."
-        ]
-        
-        import random
-        response = random.choice(dummy_responses)
+        response = random.choice(DUMMY_TEMPLATES).format(q=prompt_text)
         
         return {"response": response}
 
     except Exception as e:
         return {"response": f"⚠️ Analysis temporarily unavailable. Error: {str(e)}"}
 
+@app.post("/ai_analysis_stream", dependencies=[Depends(rate_limiter)])
+async def ai_analysis_stream(req: AIRequest):
+    """Stream the analysis as Server-Sent Events, one text delta per event"""
+    prompt_text = (req.prompt or "").strip()
+
+    async def events():
+        if not prompt_text:
+            yield sse_event(EMPTY_PROMPT_RESPONSE)
+            yield SSE_DONE
+            return
+
+        sent = False
+        if OPENAI_API_KEY:
+            key = ai_cache_key(prompt_text)
+            cached = await cache.get(key) if key else None
+            if cached:
+                yield sse_event(cached)
+                yield SSE_DONE
+                return
+
+            chunks = []
+            try:
+                async for delta in client.stream_chat(AI_MODEL, analysis_messages(prompt_text)):
+                    sent = True
+                    chunks.append(delta)
+                    yield sse_event(delta)
+
+                if key and chunks:
+                    await cache.setex(key, AI_CACHE_TTL, "".join(chunks))
+
+            except Exception as e:
+                logger.error(f"OpenAI stream error: {e}")
+                # Tell the client a partial answer was cut off; otherwise fall
+                # through to the dummy response
+                if sent:
+                    yield sse_error("Analysis stream interrupted")
+
+        if not sent:
+            yield sse_event(random.choice(DUMMY_TEMPLATES).format(q=prompt_text))
+
+        yield SSE_DONE
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @app.get("/health")
-def health():
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "openai": "configured" if OPENAI_API_KEY else "missing",
-        "news_api": "configured" if NEWS_API_KEY else "missing"
-    }
+async def health():
+    body = HEALTH_TEMPLATE % datetime.now().isoformat().encode()
+    return Response(body, media_type="application/json")
 
 @app.get("/")
-def root():
-    return {
-        "message": "Finance MCP Server running",
-        "version": "1.1.1"
-    }
+async def root():
+    return Response(ROOT_BODY, media_type="application/json")
 
 # Run server
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=5000)
+    uvicorn.run(
+        "server:app",
+        host="0.0.0.0",
+        port=5000,
+        # Containers report the host's CPUs; WEB_CONCURRENCY sets the real budget
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        # X-Forwarded-For is trusted only from FORWARDED_ALLOW_IPS (uvicorn
+        # defaults to 127.0.0.1); set it to the hosting proxy's address
+        proxy_headers=True,
+        # uvloop / httptools are used whenever installed (uvloop isn't on Windows)
+        loop="auto",
+        http="auto"
+    )
    
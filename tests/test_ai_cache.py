@@ -0,0 +1,56 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import server
+
+
+def test_identical_prompts_share_a_key():
+    key = server.ai_cache_key("Analyze Tesla stock movement")
+
+    assert key.startswith("ai:")
+    assert len(key) == len("ai:") + 32  # 16-byte BLAKE2 digest
+    assert key == server.ai_cache_key("Analyze Tesla stock movement")
+    assert key != server.ai_cache_key("Analyze Apple stock movement")
+
+
+@pytest.mark.parametrize("prompt", [
+    "How is Tesla doing today?",
+    "Should I buy NVDA now",
+    "What is the CURRENT outlook for gold?",
+])
+def test_time_sensitive_prompts_bypass_cache(prompt):
+    assert server.ai_cache_key(prompt) is None
+
+
+def test_words_containing_markers_are_still_cached():
+    assert server.ai_cache_key("Is the currency risk known?") is not None
+
+
+def test_ai_analysis_reuses_cached_answer(monkeypatch):
+    store = {}
+    calls = []
+
+    async def get(key):
+        return store.get(key)
+
+    async def setex(key, ttl, value):
+        store[key] = value
+
+    async def completion(model, messages):
+        calls.append(messages)
+        message = SimpleNamespace(content="Tesla looks volatile")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    monkeypatch.setattr(server, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(server.cache, "get", get)
+    monkeypatch.setattr(server.cache, "setex", setex)
+    monkeypatch.setattr(server.client, "chat_completion_with_retry", completion)
+
+    request = server.AIRequest(prompt="Analyze Tesla stock movement")
+    first = asyncio.run(server.ai_analysis(request))
+    second = asyncio.run(server.ai_analysis(request))
+
+    assert first == second == {"response": "Tesla looks volatile"}
+    assert len(calls) == 1
@@ -0,0 +1,75 @@
+import asyncio
+
+import httpx
+import pandas as pd
+import pytest
+from openai import BadRequestError
+
+import server
+
+
+def run(breaker, func):
+    return asyncio.run(breaker.call(func))
+
+
+def test_client_errors_do_not_open_circuit():
+    breaker = server.CircuitBreaker("test", fail_max=2)
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(400, request=request)
+
+    async def bad_prompt():
+        raise BadRequestError("context length exceeded", response=response, body=None)
+
+    for _ in range(3):
+        with pytest.raises(BadRequestError):
+            run(breaker, bad_prompt)
+
+    assert breaker.opened_at is None
+
+
+def test_connection_errors_and_5xx_responses_open_circuit():
+    breaker = server.CircuitBreaker("test", fail_max=2)
+    request = httpx.Request("GET", "https://newsapi.org/v2/everything")
+
+    async def unavailable():
+        return httpx.Response(503, request=request)
+
+    async def unreachable():
+        raise httpx.ConnectError("refused", request=request)
+
+    run(breaker, unavailable)
+    with pytest.raises(httpx.ConnectError):
+        run(breaker, unreachable)
+
+    with pytest.raises(server.CircuitOpenError):
+        run(breaker, unavailable)
+
+
+def test_empty_yfinance_batches_open_circuit():
+    breaker = server.CircuitBreaker("test", fail_max=2, is_failed_result=server.is_empty_download)
+
+    async def unreachable_yahoo():
+        # yf.download reports network errors by returning an empty frame
+        return pd.DataFrame(columns=["Close"])
+
+    run(breaker, unreachable_yahoo)
+    run(breaker, unreachable_yahoo)
+
+    with pytest.raises(server.CircuitOpenError):
+        run(breaker, unreachable_yahoo)
+
+
+def test_batch_with_data_resets_yfinance_failures():
+    breaker = server.CircuitBreaker("test", fail_max=2, is_failed_result=server.is_empty_download)
+
+    async def empty():
+        return pd.DataFrame(columns=["Close"])
+
+    async def quotes():
+        return pd.DataFrame({"Close": [1.0]})
+
+    run(breaker, empty)
+    run(breaker, quotes)
+    run(breaker, empty)
+
+    assert breaker.opened_at is None
@@ -0,0 +1,91 @@
+import asyncio
+
+import server
+
+
+def test_title_hash_ignores_case_punctuation_and_whitespace():
+    assert server.title_hash("Apple hits record") == server.title_hash("Apple Hits Record ")
+    assert server.title_hash("Apple hits record!") == server.title_hash("apple  hits record")
+    assert server.title_hash("Apple hits record") != server.title_hash("Apple misses record")
+
+
+def test_get_news_dedupes_normalized_titles(monkeypatch):
+    async def newsapi(query):
+        return [
+            {"title": "Apple hits record", "provider": "newsapi"},
+            {"title": "Fed holds rates", "provider": "newsapi"},
+        ]
+
+    async def yahoo(query):
+        return [
+            {"title": "Apple Hits Record ", "provider": "yahoo"},
+            {"title": "Oil slips", "provider": "yahoo"},
+        ]
+
+    service = server.NewsService()
+    monkeypatch.setattr(service, "get_newsapi_news", newsapi)
+    monkeypatch.setattr(service, "get_yahoo_finance_news", yahoo)
+
+    articles = asyncio.run(service.get_news("AAPL", "all"))
+
+    assert [a["title"] for a in articles] == ["Apple hits record", "Fed holds rates", "Oil slips"]
+
+
+def test_get_news_fallback_articles_hash_cleanly(monkeypatch):
+    async def empty(query):
+        return []
+
+    service = server.NewsService()
+    monkeypatch.setattr(service, "get_newsapi_news", empty)
+    monkeypatch.setattr(service, "get_yahoo_finance_news", empty)
+
+    articles = asyncio.run(service.get_news("AAPL", "all"))
+
+    assert articles
+    assert all(a["provider"] == "fallback" for a in articles)
+
+
+def test_finance_news_does_not_cache_fallback(monkeypatch):
+    stored = []
+
+    async def no_cache(key):
+        return None
+
+    async def setex(key, ttl, value):
+        stored.append(key)
+
+    async def fallback_only(query, source):
+        return server.news_service.get_fallback_news(query)
+
+    monkeypatch.setattr(server.cache, "get", no_cache)
+    monkeypatch.setattr(server.cache, "setex", setex)
+    monkeypatch.setattr(server.news_service, "get_news", fallback_only)
+
+    result = asyncio.run(server.finance_news(server.NewsRequest(query="Apple", source="all")))
+
+    assert result["query"] == "Apple"
+    assert "Latest market trends for Apple" in [a["title"] for a in result["articles"]]
+    assert stored == []
+
+
+def test_cached_news_echoes_callers_query(monkeypatch):
+    store = {}
+
+    async def get(key):
+        return store.get(key)
+
+    async def setex(key, ttl, value):
+        store[key] = value
+
+    async def live_news(query, source):
+        return [{"title": "Apple hits record", "provider": "newsapi"}]
+
+    monkeypatch.setattr(server.cache, "get", get)
+    monkeypatch.setattr(server.cache, "setex", setex)
+    monkeypatch.setattr(server.news_service, "get_news", live_news)
+
+    asyncio.run(server.finance_news(server.NewsRequest(query="AAPL", source="all")))
+    result = asyncio.run(server.finance_news(server.NewsRequest(query="aapl", source="all")))
+
+    assert list(store) == ["news:all:aapl"]
+    assert result["query"] == "aapl"
@@ -0,0 +1,83 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from openai import RateLimitError
+
+import server
+
+
+class FakeStream:
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+    def __aiter__(self):
+        return self.chunks()
+
+    async def chunks(self):
+        for delta in self.deltas:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+
+def test_stream_chat_closes_upstream_when_client_disconnects(monkeypatch):
+    stream = FakeStream(["Apple ", "looks ", "strong"])
+    client = server.RobustOpenAIClient(api_key="test")
+
+    async def open_stream(model, messages, **kwargs):
+        return stream
+
+    monkeypatch.setattr(client, "chat_completion_with_retry", open_stream)
+
+    async def read_first_delta():
+        deltas = client.stream_chat("model", [])
+        first = await deltas.__anext__()
+        await deltas.aclose()  # what StreamingResponse does on disconnect
+        return first
+
+    assert asyncio.run(read_first_delta()) == "Apple "
+    assert stream.closed
+
+
+def test_backoff_is_jittered_and_capped():
+    client = server.RobustOpenAIClient(api_key="test")
+
+    for attempt, base in [(0, 1), (1, 2), (2, 4), (10, 30)]:
+        delays = [client.backoff_delay(attempt) for _ in range(50)]
+        assert all(base <= delay <= base * 1.5 for delay in delays)
+
+    assert len(set(client.backoff_delay(1) for _ in range(50))) > 1
+
+
+def rate_limited(retry_after):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+@pytest.mark.parametrize("retry_after, expected", [("3600", 30), ("2", 2)])
+def test_retry_after_is_honored_up_to_max_delay(monkeypatch, retry_after, expected):
+    client = server.RobustOpenAIClient(api_key="test")
+    sleeps = []
+
+    async def create(**kwargs):
+        raise rate_limited(retry_after)
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(client.client.chat.completions, "create", create)
+    monkeypatch.setattr(server.asyncio, "sleep", sleep)
+
+    with pytest.raises(HTTPException):
+        asyncio.run(client.chat_completion_with_retry("model", []))
+
+    assert sleeps == [expected] * (client.max_retries - 1)
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+from yfinance.exceptions import YFException
+
+import server
+
+
+def fake_download(tickers, **kwargs):
+    symbols = tickers.split()
+    index = pd.DatetimeIndex([pd.Timestamp("2024-01-02", tz="America/New_York")])
+    columns = pd.MultiIndex.from_product([symbols, ["Close"]])
+    return pd.DataFrame([[float(i) for i in range(len(symbols))]], index=index, columns=columns)
+
+
+def test_batched_downloads_never_overlap(monkeypatch):
+    active = []
+    overlaps = []
+
+    def download(tickers, **kwargs):
+        active.append(tickers)
+        overlaps.append(len(active))
+        time.sleep(0.02)
+        active.remove(tickers)
+        return fake_download(" ".join(tickers), **kwargs)
+
+    monkeypatch.setattr(server.yf, "download", download)
+    batcher = server.QuoteBatcher(max_batch=2)
+
+    async def run():
+        return await asyncio.gather(*(batcher.get_history(s) for s in ["A", "B", "C", "D", "E"]))
+
+    frames = asyncio.run(run())
+
+    assert max(overlaps) == 1
+    assert len(overlaps) == 3
+    assert all(not frame.empty for frame in frames)
+    assert frames[0].index[-1].isoformat() == "2024-01-02T00:00:00-05:00"
+
+
+def test_missing_download_result_is_empty(monkeypatch):
+    monkeypatch.setattr(server.yf, "download", lambda tickers, **kwargs: None)
+    batcher = server.QuoteBatcher(timeout=1)
+
+    assert asyncio.run(batcher.get_history("AAPL")).empty
+
+
+def test_download_errors_resolve_waiting_callers(monkeypatch):
+    def download(tickers, **kwargs):
+        raise YFException("Yahoo rejected the request")
+
+    monkeypatch.setattr(server.yf, "download", download)
+    batcher = server.QuoteBatcher(timeout=1)
+
+    with pytest.raises(YFException):
+        asyncio.run(batcher.get_history("AAPL"))
+
+
+@pytest.mark.parametrize("symbol", ["", "AAPL,MSFT", "AAPL MSFT", "AAPL\tMSFT"])
+def test_symbols_that_expand_into_many_tickers_are_rejected(monkeypatch, symbol):
+    monkeypatch.setattr(server.yf, "download", pytest.fail)
+    batcher = server.QuoteBatcher()
+
+    with pytest.raises(server.InvalidSymbolError):
+        asyncio.run(batcher.get_history(symbol))
+
+
+def test_tickers_are_passed_as_a_list(monkeypatch):
+    seen = []
+
+    def download(tickers, **kwargs):
+        seen.append(tickers)
+        return fake_download(" ".join(tickers), **kwargs)
+
+    monkeypatch.setattr(server.yf, "download", download)
+    asyncio.run(server.QuoteBatcher().get_history("AAPL"))
+
+    assert seen == [["AAPL"]]
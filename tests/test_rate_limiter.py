@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [130.0]
+    monkeypatch.setattr(server.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def local_cache():
+    return server.Cache("redis://unused")
+
+
+def test_hit_blocks_after_limit_until_window_rolls_over(clock, local_cache):
+    limiter = server.RateLimiter(local_cache, limit=2, window=60, dashboard_limit=10)
+
+    assert asyncio.run(limiter.hit("1.2.3.4", 2)) == 0
+    assert asyncio.run(limiter.hit("1.2.3.4", 2)) == 0
+    assert asyncio.run(limiter.hit("1.2.3.4", 2)) == 51  # seconds left in [120, 180)
+    assert asyncio.run(limiter.hit("5.6.7.8", 2)) == 0
+
+    clock[0] = 180.0
+    assert asyncio.run(limiter.hit("1.2.3.4", 2)) == 0
+
+
+def test_over_limit_returns_429_envelope_with_retry_after(clock, monkeypatch):
+    limiter = server.RateLimiter(server.cache, limit=1, window=60, dashboard_limit=10)
+    monkeypatch.setattr(server.rate_limiter, "hit", limiter.hit)
+    monkeypatch.setattr(server.rate_limiter, "limit", 1)
+
+    with TestClient(server.app) as client:
+        first = client.post("/ai_analysis", json={"prompt": ""})
+        second = client.post("/ai_analysis", json={"prompt": ""})
+
+    assert first.status_code == 200
+    assert second.status_code == 429
+    assert second.headers["Retry-After"] == "51"
+    assert second.json() == {
+        "ok": False,
+        "code": "agent.rate_limited",
+        "message": "Rate limit of 1 requests per 60s exceeded",
+    }
+
+
+def test_dashboard_key_gets_its_own_bucket(clock, monkeypatch):
+    limiter = server.RateLimiter(server.cache, limit=1, window=60, dashboard_limit=3)
+    monkeypatch.setattr(server, "DASHBOARD_API_KEY", "secret")
+    seen = []
+    original_hit = limiter.hit
+
+    async def hit(client_id, limit):
+        seen.append((client_id, limit))
+        return await original_hit(client_id, limit)
+
+    monkeypatch.setattr(limiter, "hit", hit)
+
+    def request(headers):
+        return SimpleNamespace(headers=headers, client=SimpleNamespace(host="10.0.0.1"))
+
+    asyncio.run(limiter(request({"x-dashboard-key": "secret"})))
+    asyncio.run(limiter(request({"x-dashboard-key": "wrong"})))
+
+    assert seen == [("dashboard", 3), ("10.0.0.1", 1)]